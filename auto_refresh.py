@@ -6,45 +6,74 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import argparse
 import sys
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import concurrent.futures
+import functools
+import atexit
+import shutil
+
+# 匹配ANSI颜色代码的正则表达式
+_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+# 匹配空白字符的正则表达式
+_WHITESPACE_RE = re.compile(r'\s+')
+# 匹配int()可以解析的整数（可带符号和数字分隔下划线，如 1_000）
+_INTEGER_RE = re.compile(r'[+-]?\d+(?:_\d+)*')
+
+# 终端颜色（上涨红色，下跌绿色，持平黄色）
+RED = '\x1b[91m'
+GREEN = '\x1b[92m'
+YELLOW = '\x1b[93m'
+RESET = '\x1b[0m'
+
+# 按符号索引的颜色和趋势符号：(下跌, 持平, 上涨)，索引由 _sign_index 计算
+SIGN_COLORS = (GREEN, YELLOW, RED)
+TREND = (f"{GREEN}↓{RESET}", f"{YELLOW}-{RESET}", f"{RED}↑{RESET}")
+
+
+def _sign_index(value):
+    """返回数值符号对应的索引：负数为0，零为1，正数为2"""
+    return (value > 0) - (value < 0) + 1
+
 
-# 全局变量存储每个股票的最新价格
-last_prices = {}
 try:
     from wcwidth import wcswidth
 except ImportError:
     # 如果没有安装wcwidth库，则定义一个简单的替代函数
     def wcswidth(s):
         """简单估算字符串显示宽度的函数"""
-        width = 0
-        for char in s:
-            if ord(char) < 127:  # ASCII字符
-                width += 1
-            else:  # 假设中文或其他字符占2个位置
-                width += 2
-        return width
+        if s.isascii():  # 纯ASCII字符串的宽度即为长度
+            return len(s)
+        # ASCII字符占1个位置，假设中文或其他字符占2个位置
+        return sum(1 if ord(char) < 127 else 2 for char in s)
 
 
 def get_ansi_stripped_length(text):
     """
     计算去除ANSI颜色代码后的字符串长度
     """
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return len(ansi_escape.sub('', text))
+    # 不含ESC字符时无需执行正则替换
+    if '\x1B' not in text:
+        return len(text)
+    return len(_ANSI_RE.sub('', text))
 
 
 def format_with_color_padding(text, width, align = '>'):
     """
     格式化带颜色的文本，确保对齐正确
     """
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    stripped_text = ansi_escape.sub('', text)
-    stripped_len = wcswidth(stripped_text)
+    # 不含ESC字符时无需执行正则替换
+    if '\x1B' not in text:
+        stripped_text = text
+    else:
+        stripped_text = _ANSI_RE.sub('', text)
+    # 纯ASCII文本的显示宽度即为长度，无需调用wcswidth
+    stripped_len = len(stripped_text) if stripped_text.isascii() else wcswidth(stripped_text)
     padding_needed = max(0, width - stripped_len)
 
     if align == '>':
@@ -64,7 +93,8 @@ def format_column_text(text, width, align='left'):
     使用wcwidth格式化列文本以实现正确的对齐
     """
     text_str = str(text)
-    text_width = wcswidth(text_str)
+    # 纯ASCII文本的显示宽度即为长度，无需调用wcswidth
+    text_width = len(text_str) if text_str.isascii() else wcswidth(text_str)
     padding_needed = max(0, width - text_width)
 
     if align == 'left':
@@ -79,107 +109,272 @@ def format_column_text(text, width, align='left'):
         return text_str
 
 
-def get_stock_realtime_data(stock_code):
+# 带缓存的列格式化，名称、数量、"--"等内容在各次刷新之间大量重复
+# 参数需为可哈希的字符串
+_format_column_cached = functools.lru_cache(maxsize=4096)(format_column_text)
+
+
+# 光标移到左上角并清屏（含滚动缓冲区）的ANSI转义序列
+CLEAR_SCREEN = '\x1b[H\x1b[2J\x1b[3J'
+# 隐藏/显示光标的ANSI转义序列
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+
+# 分隔线
+SEPARATOR = "-" * 120
+
+# 表头不依赖实时数据，只需格式化一次
+HEADER_LINE = " ".join([
+    format_column_text('Name', 20, 'right'),
+    format_column_text('Qty', 10, 'right'),
+    format_column_text('Trend', 6, 'right'),
+    format_column_text('High', 8, 'right'),
+    format_column_text('Low', 8, 'right'),
+    format_column_text('Price', 10, 'right'),
+    format_column_text('Change%', 12, 'right'),
+    format_column_text('Profit', 14, 'right'),
+    format_column_text('Time', 10, 'right'),
+])
+
+# 无法获取数据时显示的行，只有名称和数量两列需要填充
+MISSING_ROW_TEMPLATE = " ".join([
+    "{name}",
+    "{qty}",
+    format_with_color_padding(TREND[1], 6, '>'),  # 趋势符号，右对齐
+    format_column_text('--', 8, 'right'),  # 最高价
+    format_column_text('--', 8, 'right'),  # 最低价
+    format_column_text('--', 10, 'right'),
+    format_column_text('--', 12, 'right'),
+    format_column_text('--', 14, 'right'),
+    format_column_text('--', 10, 'right'),
+])
+
+
+# 新浪财经行情接口每次请求的最大股票数量（受URL长度限制）
+BATCH_SIZE = 80
+
+# 请求超时时间（连接超时, 读取超时），避免单个请求卡住整个刷新周期
+REQUEST_TIMEOUT = (3, 5)
+
+# 复用同一个会话，使每次刷新都能复用已建立的keep-alive连接
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Referer': 'https://finance.sina.com.cn/'
+})
+_SESSION.mount('http://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+# 多批次并发请求的线程池，在各次刷新之间复用，线程数与连接池大小一致
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix='sina-fetch')
+atexit.register(_EXECUTOR.shutdown, wait=False)
+
+# 交易时段内行情缓存时间（秒），只用于合并同一时刻的重复请求
+QUOTE_TTL = 1.0
+# 休市期间行情不再变化，缓存时间（秒）可以长得多
+CLOSED_QUOTE_TTL = 300.0
+# A股交易时段（当天的秒数），包含9:15开始的集合竞价
+_TRADING_SESSIONS = ((9 * 3600 + 15 * 60, 11 * 3600 + 30 * 60), (13 * 3600, 15 * 3600))
+# 连续竞价开始时间（当天的秒数）
+_CONTINUOUS_TRADING_START = 9 * 3600 + 30 * 60
+# 每个交易时段结束后仍按交易时段缓存的宽限时间（秒），等待收盘集合竞价等最终行情
+_SESSION_CLOSE_GRACE = 120
+# 交易时段以北京时间为准，与本机时区无关
+CHINA_TZ = timezone(timedelta(hours=8))
+
+# 行情缓存：{股票代码: (过期时间, 股票信息)}
+_QUOTE_CACHE = {}
+
+# 匹配批量返回数据中的每一行：var hq_str_sh600000="...";
+_QUOTE_LINE_RE = re.compile(r'var hq_str_([a-z]{2}\d{6})="([^"]*)"')
+
+
+def _format_symbol(stock_code):
     """
-    从新浪财经获取实时股票数据
-    股票代码格式：000001 或 600000
+    将股票代码转换为新浪财经的行情代码
+    000001 -> sz000001，600000 -> sh600000
     """
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Referer': 'https://finance.sina.com.cn/'
+    if stock_code.startswith(('5', '6', '9')):  # 上海证券交易所
+        return 'sh{}'.format(stock_code)
+    return 'sz{}'.format(stock_code)  # 深圳证券交易所
+
+
+def _parse_fields(stock_code, data_str):
+    """
+    解析单只股票的行情字段
+    数据无效时返回None
+    """
+    if not data_str:
+        return None
+
+    fields = data_str.split(',')
+
+    if len(fields) >= 32:
+        name = fields[0]
+        clean_name = name
+
+        # 移除名称中的空格以改善对齐
+        clean_name = clean_name.replace(' ', '')
+
+        # 检查股票是否停牌
+        # 股票被认为停牌的条件：
+        # 1. 当前价格等于前收盘价（无波动）
+        # 2. 成交量为0（无交易）
+        # 3. 最高价和最低价等于前收盘价（当天无价格波动）
+        price = float(fields[3])
+        pre_close = float(fields[2])
+        volume = int(fields[8])
+        high = float(fields[4])
+        low = float(fields[5])
+
+        # 检查停牌条件
+        # 特殊情况：如果价格为0，可能表示停牌或无数据
+        is_suspended = (
+            (price == pre_close and volume == 0 and high == low and high == pre_close) or
+            (price == 0 and pre_close != 0) or  # 价格为0但前收盘价不为0（表示停牌）
+            (volume == 0 and price == pre_close)  # 无成交量且价格无变化
+        )
+
+        return {
+            'code': stock_code,
+            'name': clean_name,        # 清理后的股票名称
+            'pre_close': pre_close,      # 昨日收盘价
+            'price': price,              # 当前价格
+            'high': high,                # 今日最高价
+            'low': low,                  # 今日最低价
+            'date': fields[30],          # 日期
+            'time': fields[31],          # 时间
+            'is_suspended': is_suspended  # 停牌状态
         }
+    else:
+        # 如果字段数量不足，尝试简化处理
+        if len(fields) >= 4:
+            name = fields[0] if fields[0] else f"Stock{stock_code}"
+            # 分析股票名称以确定是否包含类别标识符
+            clean_name = name
+
+            # 移除名称中的空格以改善对齐
+            clean_name = _WHITESPACE_RE.sub('', clean_name)
+
+            # 对于简化处理，检查股票是否似乎已停牌
+            price = float(fields[3]) if fields[3] else 0
+            pre_close = float(fields[2]) if fields[2] else 0
+
+            # 简化数据的增强停牌检测
+            is_suspended = (
+                (price == pre_close and price == 0 and pre_close != 0) or  # 价格为0但前收盘价不为0
+                (price != 0 and price == pre_close) or  # 相同价格，非零
+                (price == 0 and pre_close != 0)  # 当前价格为0但前收盘价不为0
+            )
+
+            return {
+                'code': stock_code,
+                'name': clean_name,
+                'price': price,
+                'pre_close': pre_close,
+                'time': datetime.now().strftime('%H:%M:%S'),
+                'is_suspended': is_suspended  # 停牌状态
+            }
+
+    return None
+
+
+def _quote_ttl(stock_info, now=None):
+    """
+    根据北京时间和行情日期计算行情缓存时间（秒）
+    交易时段内使用短缓存，休市期间缓存到下一交易时段开始
+    连续竞价开始后行情日期仍不是当天，说明当天休市（节假日），同样使用长缓存
+    """
+    now = now or datetime.now(CHINA_TZ)
+    if now.weekday() >= 5:  # 周末休市
+        return CLOSED_QUOTE_TTL
+
+    seconds = now.hour * 3600 + now.minute * 60 + now.second
+    for start, end in _TRADING_SESSIONS:
+        if seconds < start:  # 开盘前或午间休市
+            return min(float(start - seconds), CLOSED_QUOTE_TTL)
+        if seconds < end + _SESSION_CLOSE_GRACE:  # 交易时段内（含收盘宽限时间）
+            quote_date = stock_info.get('date')
+            if (seconds >= _CONTINUOUS_TRADING_START and quote_date
+                    and quote_date != now.strftime('%Y-%m-%d')):
+                return CLOSED_QUOTE_TTL
+            return QUOTE_TTL
+    return CLOSED_QUOTE_TTL  # 收盘后
+
+
+def get_stocks_realtime_batch(stock_codes):
+    """
+    通过一次请求从新浪财经批量获取实时股票数据
+    返回 ({股票代码: 股票信息}, 错误信息列表)，获取失败的股票对应None
+    错误信息为 (简短说明, 详细说明) 元组，简短说明用于表格下方的显示
+    缓存未过期的股票直接使用缓存，不再发起请求
+    """
+    results = dict.fromkeys(stock_codes)
+    errors = []
+
+    # 先从缓存中读取未过期的行情
+    now = time.monotonic()
+    pending_codes = []
+    for stock_code in results:
+        cached = _QUOTE_CACHE.get(stock_code)
+        if cached and now < cached[0]:
+            results[stock_code] = cached[1]
+        else:
+            pending_codes.append(stock_code)
 
-        # 确定市场代码并格式化股票代码
-        if stock_code.startswith(('5', '6', '9')):  # 上海证券交易所
-            symbol = 'sh{}'.format(stock_code)
-        else:  # 深圳证券交易所
-            symbol = 'sz{}'.format(stock_code)
+    if not pending_codes:
+        return results, errors
 
-        # 新浪财经实时数据API
-        url = "http://hq.sinajs.cn/list={}".format(symbol)
+    try:
+        # 新浪财经实时数据API，多个代码以逗号分隔
+        url = "http://hq.sinajs.cn/list=" + ",".join(map(_format_symbol, pending_codes))
 
-        response = requests.get(url, headers=headers)
+        response = _SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         response.encoding = 'gbk'  # 新浪财经使用GBK编码
 
-        # 解析返回的数据
-        content = response.text.strip()
-        if 'var hq_str_' in content:
-            # 提取数据部分
-            data_str = content.split('"')[1] if '"' in content else ""
-            if data_str:
-                fields = data_str.split(',')
-
-                if len(fields) >= 32:
-                    name = fields[0]
-                    clean_name = name
-
-                    # 移除名称中的空格以改善对齐
-                    clean_name = clean_name.replace(' ', '')
-
-                    # 检查股票是否停牌
-                    # 股票被认为停牌的条件：
-                    # 1. 当前价格等于前收盘价（无波动）
-                    # 2. 成交量为0（无交易）
-                    # 3. 最高价和最低价等于前收盘价（当天无价格波动）
-                    price = float(fields[3])
-                    pre_close = float(fields[2])
-                    volume = int(fields[8])
-                    high = float(fields[4])
-                    low = float(fields[5])
-
-                    # 检查停牌条件
-                    # 特殊情况：如果价格为0，可能表示停牌或无数据
-                    is_suspended = (
-                        (price == pre_close and volume == 0 and high == low and high == pre_close) or
-                        (price == 0 and pre_close != 0) or  # 价格为0但前收盘价不为0（表示停牌）
-                        (volume == 0 and price == pre_close)  # 无成交量且价格无变化
-                    )
-
-                    return {
-                        'code': stock_code,
-                        'name': clean_name,        # 清理后的股票名称
-                        'pre_close': float(fields[2]), # 昨日收盘价
-                        'price': float(fields[3]),   # 当前价格
-                        'high': float(fields[4]),    # 今日最高价
-                        'low': float(fields[5]),     # 今日最低价
-                        'time': fields[31],          # 时间
-                        'is_suspended': is_suspended  # 停牌状态
-                    }
-                else:
-                    # 如果字段数量不足，尝试简化处理
-                    if len(fields) >= 4:
-                        name = fields[0] if fields[0] else f"Stock{stock_code}"
-                        # 分析股票名称以确定是否包含类别标识符
-                        clean_name = name
-
-                        # 移除名称中的空格以改善对齐
-                        clean_name = re.sub(r'\s+', '', clean_name)
-
-                        # 对于简化处理，检查股票是否似乎已停牌
-                        price = float(fields[3]) if fields[3] and fields[3] != '' else 0
-                        pre_close = float(fields[2]) if len(fields) > 2 and fields[2] and fields[2] != '' else 0
-
-                        # 简化数据的增强停牌检测
-                        is_suspended = (
-                            (price == pre_close and price == 0 and pre_close != 0) or  # 价格为0但前收盘价不为0
-                            (price != 0 and price == pre_close) or  # 相同价格，非零
-                            (price == 0 and pre_close != 0)  # 当前价格为0但前收盘价不为0
-                        )
-
-                        return {
-                            'code': stock_code,
-                            'name': clean_name,
-                            'price': float(fields[3]) if fields[3] and fields[3] != '' else 0,
-                            'pre_close': float(fields[2]) if len(fields) > 2 and fields[2] and fields[2] != '' else 0,
-                            'time': datetime.now().strftime('%H:%M:%S'),
-                            'is_suspended': is_suspended  # 停牌状态
-                        }
+        # 逐行解析返回的数据
+        for line in response.text.splitlines():
+            match = _QUOTE_LINE_RE.search(line)
+            if not match:
+                continue
+            stock_code = match.group(1)[2:]  # 去掉 sh/sz 前缀
+            if stock_code not in results:
+                continue
+            try:
+                stock_info = _parse_fields(stock_code, match.group(2))
+            except (ValueError, IndexError) as e:
+                errors.append((
+                    f"解析股票 {stock_code} 数据时出错: {type(e).__name__}",
+                    f"解析股票 {stock_code} 数据时出错: {e}"
+                ))
+                continue
+            results[stock_code] = stock_info
+            # 只缓存有效数据，获取失败的股票下次重新请求
+            if stock_info:
+                _QUOTE_CACHE[stock_code] = (time.monotonic() + _quote_ttl(stock_info), stock_info)
 
     except Exception as e:
-        print(f"获取股票 {stock_code} 数据时出错: {e}")
-        return None
+        errors.append((
+            f"获取 {len(pending_codes)} 只股票数据时出错: {type(e).__name__}",
+            f"获取股票 {','.join(pending_codes)} 数据时出错: {e}"
+        ))
+
+    return results, errors
+
+
+def get_stock_realtime_data(stock_code):
+    """
+    从新浪财经获取单只股票的实时数据
+    股票代码格式：000001 或 600000
+    """
+    results, errors = get_stocks_realtime_batch([stock_code])
+    for _, detail in errors:
+        print(detail)
+    return results[stock_code]
 
 
 def read_stock_list(file_path):
@@ -189,25 +384,23 @@ def read_stock_list(file_path):
     """
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+            text = f.read()
 
         stocks = []
-        for line in lines:
+        for line in text.splitlines():
             line = line.strip()
-            if line and not line.startswith('#'):
-                # 提取股票代码和持有数量（前两部分）
-                parts = line.split()
-                if parts:
-                    # 提取股票代码的纯数字部分
-                    code = parts[0].split('.')[0]  # 移除 .SZ 或 .SH 后缀
-                    # 提取持有数量，如果未提供则默认为0
-                    quantity = 0
-                    if len(parts) >= 2:
-                        try:
-                            quantity = int(parts[1])
-                        except ValueError:
-                            quantity = 0  # 如果不是有效整数则默认为0
-                    stocks.append({'code': code, 'quantity': quantity})
+            if not line or line[0] == '#':
+                continue
+
+            # 提取股票代码和持有数量（前两部分），其余部分视为备注
+            parts = line.split(None, 2)
+            # 提取股票代码的纯数字部分
+            code = parts[0].partition('.')[0]  # 移除 .SZ 或 .SH 后缀
+            # 提取持有数量，如果未提供或不是有效整数则默认为0
+            quantity = 0
+            if len(parts) >= 2 and _INTEGER_RE.fullmatch(parts[1]):
+                quantity = int(parts[1])
+            stocks.append({'code': code, 'quantity': quantity})
 
         return stocks
     except Exception as e:
@@ -215,53 +408,50 @@ def read_stock_list(file_path):
         return []
 
 
-def display_stock_info(stock_info, holding_quantity=0, last_price=None):
-    """格式化显示单个股票信息，包括持有数量、收益金额、趋势、最高价和最低价"""
-    if stock_info:
-        # 检查是否停牌
-        is_suspended = stock_info.get('is_suspended', False)
-
+def calc_stock_metrics(stock_info, holding_quantity=0):
+    """
+    计算单个股票的显示价格、涨跌额、涨跌幅、收益金额和成本
+    停牌股票使用昨收价作为显示价格，涨跌为0
+    """
+    price = stock_info['price']
+    pre_close = stock_info['pre_close']
+
+    # 如果是停牌股票，使用昨收价作为显示价格，涨跌设为0
+    if stock_info.get('is_suspended', False):
+        display_price = pre_close  # 使用昨收价显示
+        change = 0.0  # 涨跌额为0
+        change_pct = 0.0  # 涨跌幅为0
+    else:
+        display_price = price  # 使用实际价格
         # 计算涨跌额和涨跌幅
-        change = stock_info['price'] - stock_info['pre_close']
-        change_pct = (change / stock_info['pre_close']) * 100
-
-        # 如果是停牌股票，使用昨收价作为显示价格，涨跌设为0
-        if is_suspended:
-            display_price = stock_info['pre_close']  # 使用昨收价显示
-            change = 0.0  # 涨跌额为0
-            change_pct = 0.0  # 涨跌幅为0
-        else:
-            display_price = stock_info['price']  # 使用实际价格
+        change = price - pre_close
+        change_pct = (change / pre_close) * 100
 
-        # 计算收益金额
-        profit_amount = (display_price - stock_info['pre_close']) * holding_quantity
+    # 计算收益金额和成本
+    profit_amount = (display_price - pre_close) * holding_quantity
+    cost = pre_close * holding_quantity
 
-        # 计算趋势
-        trend_symbol = ""
+    return display_price, change, change_pct, profit_amount, cost
+
+
+def display_stock_info(stock_info, holding_quantity=0, last_price=None):
+    """格式化单个股票信息的显示行，包括持有数量、收益金额、趋势、最高价和最低价"""
+    if stock_info:
+        display_price, change, change_pct, profit_amount, cost = calc_stock_metrics(stock_info, holding_quantity)
+
+        # 计算趋势：红色上升，绿色下降，黄色持平（首次显示为持平）
         if last_price is not None:
-            if display_price > last_price:
-                trend_symbol = "\033[91m↑\033[0m"  # 红色上升
-            elif display_price < last_price:
-                trend_symbol = "\033[92m↓\033[0m"  # 绿色下降
-            else:
-                trend_symbol = "\033[93m-\033[0m"  # 黄色持平
+            trend_symbol = TREND[_sign_index(display_price - last_price)]
         else:
-            trend_symbol = "\033[93m-\033[0m"  # 首次显示为黄色持平
+            trend_symbol = TREND[1]
 
-        # 根据涨跌显示颜色（如果终端支持）
+        # 根据涨跌显示颜色（如果终端支持），零值使用+0.00格式以保持对齐
         change_pct_str = f"{change_pct:>+8.2f}%"
         profit_str = f"{profit_amount:>+10.2f}"
 
-        if change > 0:
-            change_pct_display = f"\033[91m{change_pct_str}\033[0m"  # 红色
-            profit_display = f"\033[91m{profit_str}\033[0m"  # 红色
-        elif change < 0:
-            change_pct_display = f"\033[92m{change_pct_str}\033[0m"  # 绿色
-            profit_display = f"\033[92m{profit_str}\033[0m"  # 绿色
-        else:
-            # 对于零值，使用+0.00格式以保持对齐
-            change_pct_display = f"\033[93m{change_pct_str}\033[0m"  # 黄色，显示为+0.00（停牌或无变动）
-            profit_display = f"\033[93m{profit_str}\033[0m"  # 黄色
+        color = SIGN_COLORS[_sign_index(change)]
+        change_pct_display = f"{color}{change_pct_str}{RESET}"
+        profit_display = f"{color}{profit_str}{RESET}"
 
         # 使用固定长度填充以确保对齐
         name = stock_info['name']
@@ -270,33 +460,34 @@ def display_stock_info(stock_info, holding_quantity=0, last_price=None):
         name_display = name[:16]  # 限制名称长度为16个字符
 
         # 使用新函数格式化各列
-        name_part = format_column_text(name_display, 20, 'right')
-        quantity_part = format_column_text(holding_quantity, 10, 'right')
+        name_part = _format_column_cached(name_display, 20, 'right')
+        quantity_part = _format_column_cached(str(holding_quantity), 10, 'right')
         # 确保趋势符号列宽度固定为6个字符（不包括颜色代码），右对齐，以容纳最宽的符号
         # trend_part = format_with_color_padding(trend_symbol, 6, '>')  # 趋势符号，右对齐
         trend_aligned = " " * 5 + trend_symbol
-        high_part = format_column_text(f"{stock_info.get('high', 0):.2f}", 8, 'right')  # 最高价
-        low_part = format_column_text(f"{stock_info.get('low', 0):.2f}", 8, 'right')  # 最低价
-        price_part = format_column_text(f"{display_price:.2f}", 10, 'right')  # 使用调整后的价格显示
+        high_part = _format_column_cached(f"{stock_info.get('high', 0):.2f}", 8, 'right')  # 最高价
+        low_part = _format_column_cached(f"{stock_info.get('low', 0):.2f}", 8, 'right')  # 最低价
+        price_part = _format_column_cached(f"{display_price:.2f}", 10, 'right')  # 使用调整后的价格显示
 
         # 计算涨跌百分比所需的空格数（基于非颜色版本的长度）
-        pct_spaces = 12 - wcswidth(change_pct_str)
+        # 数字格式化结果一定是ASCII，显示宽度即为长度；数值过大时长度会超出格式宽度，因此不能写死
+        pct_spaces = 12 - len(change_pct_str)
         pct_aligned = " " * max(0, pct_spaces) + change_pct_display
 
         # 利润金额间距
-        profit_spaces = 14 - wcswidth(profit_str)
+        profit_spaces = 14 - len(profit_str)
         profit_aligned = " " * max(0, profit_spaces) + profit_display
 
         # 格式化时间显示（仅时间，无日期）
         stock_time = stock_info.get('time', 'N/A')
 
         # 使用新函数格式化时间列
-        time_part = format_column_text(stock_time, 10, 'right')
+        time_part = _format_column_cached(str(stock_time), 10, 'right')
 
-        print(f"{name_part} {quantity_part} {trend_aligned} {high_part} {low_part} {price_part} {pct_aligned} {profit_aligned} {time_part}")
+        line = f"{name_part} {quantity_part} {trend_aligned} {high_part} {low_part} {price_part} {pct_aligned} {profit_aligned} {time_part}"
 
-        return profit_amount, display_price, stock_info['pre_close'] * holding_quantity  # 返回利润金额、当前价格和成本
-    return 0, 0, 0  # 如果没有股票信息，返回0
+        return line, profit_amount, display_price, cost  # 返回显示行、利润金额、当前价格和成本
+    return "", 0, 0, 0  # 如果没有股票信息，返回空行和0
 
 
 def main():
@@ -319,189 +510,201 @@ def main():
     monitor_loop(stock_list, args.interval, sort_by_profit=args.sort_by_profit)
 
 def get_all_stock_data(stock_list):
-    """并发获取所有股票数据"""
-    stock_data = {}
-
-    # 使用线程池并发获取数据
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        # 提交所有任务
-        future_to_code = {
-            executor.submit(get_stock_realtime_data, stock_item['code']): stock_item
-            for stock_item in stock_list
-        }
-
-        # 获取结果
-        for future in concurrent.futures.as_completed(future_to_code):
-            stock_item = future_to_code[future]
-            stock_code = stock_item['code']
-            holding_quantity = stock_item['quantity']
+    """
+    并发获取所有股票数据
+    返回 (股票数据字典, 简短错误信息列表)，错误信息由调用方负责显示
+    """
+    stock_data = {
+        stock_item['code']: {'info': None, 'quantity': stock_item['quantity']}
+        for stock_item in stock_list
+    }
+
+    # 按批次拆分股票代码，每批只需一次请求
+    errors = []
+    codes = list(stock_data)
+    chunks = [codes[i:i + BATCH_SIZE] for i in range(0, len(codes), BATCH_SIZE)]
+
+    # 只有一个批次时直接在当前线程请求，无需线程池
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            results, chunk_errors = get_stocks_realtime_batch(chunk)
+            for stock_code, stock_info in results.items():
+                stock_data[stock_code]['info'] = stock_info
+            errors.extend(summary for summary, _ in chunk_errors)
+        return stock_data, errors
+
+    # 多个批次时同时发出所有请求，刷新耗时取决于最慢的一个请求
+    future_to_chunk = {
+        _EXECUTOR.submit(get_stocks_realtime_batch, chunk): chunk
+        for chunk in chunks
+    }
+
+    # 获取结果
+    for future in concurrent.futures.as_completed(future_to_chunk):
+        chunk = future_to_chunk[future]
+
+        try:
+            results, chunk_errors = future.result()
+            for stock_code, stock_info in results.items():
+                stock_data[stock_code]['info'] = stock_info
+            errors.extend(summary for summary, _ in chunk_errors)
+        except Exception as e:
+            errors.append(f"获取 {len(chunk)} 只股票数据时出错: {type(e).__name__}")
+
+    return stock_data, errors
+
+
+def get_line_rows(text, columns):
+    """
+    计算一行文本在终端中实际占用的行数（超出终端宽度时会自动换行）
+    """
+    stripped_text = _ANSI_RE.sub('', text) if '\x1B' in text else text
+    if stripped_text.isascii():
+        width = len(stripped_text)
+    else:
+        width = wcswidth(stripped_text)
+        if width < 0:  # 含有不可打印字符时wcswidth返回-1，按字符数估算
+            width = len(stripped_text)
+    return max(1, -(-width // columns))
 
-            try:
-                stock_info = future.result()
-                stock_data[stock_code] = {
-                    'info': stock_info,
-                    'quantity': holding_quantity
-                }
-            except Exception as e:
-                print(f"获取股票 {stock_code} 数据时出错: {e}")
-                stock_data[stock_code] = {
-                    'info': None,
-                    'quantity': holding_quantity
-                }
 
-    return stock_data
+def build_repaint(lines, last_lines, line_rows):
+    """
+    生成只重绘变化行的输出内容
+    每行使用绝对坐标定位后覆盖并清除行尾，最后将光标移到倒计时所在行
+    line_rows 为每行实际占用的终端行数，需与上次输出时一致
+    """
+    parts = []
+    row = 1
+    for line, last_line, rows in zip(lines, last_lines, line_rows):
+        if line != last_line:
+            parts.append(f"\x1b[{row};1H{line}\x1b[K")
+        row += rows
+    parts.append(f"\x1b[{row};1H")
+    return ''.join(parts)
 
 
 def monitor_loop(stock_list, interval, sort_by_profit=True):
     """循环监控模式"""
+    # 按股票在列表中的位置存储上次价格，用于趋势判断
+    last_prices = [None] * len(stock_list)
+    # 上次输出到屏幕的各行内容和终端尺寸，用于只重绘变化的行
+    last_frame = []
+    last_line_rows = []
+    last_term_size = None
+
+    sys.stdout.write(HIDE_CURSOR)
+
     try:
         while True:
-            # 清屏（在支持的终端上）
-            import os
-            os.system('clear' if os.name == 'posix' else 'cls')
-
-            print(f"Stock Monitor - Update Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"Number of Stocks: {len(stock_list)} | Interval: {interval}s")
-            print("-" * 120)
-            # 使用新函数格式化表头以实现正确对齐
-            header_name = format_column_text('Name', 20, 'right')
-            header_qty = format_column_text('Qty', 10, 'right')
-            header_trend = format_column_text('Trend', 6, 'right')
-            header_high = format_column_text('High', 8, 'right')
-            header_low = format_column_text('Low', 8, 'right')
-            header_price = format_column_text('Price', 10, 'right')
-            header_change = format_column_text('Change%', 12, 'right')
-            header_profit = format_column_text('Profit', 14, 'right')
-            header_time = format_column_text('Time', 10, 'right')
-
-            print(f"{header_name} {header_qty} {header_trend} {header_high} {header_low} {header_price} {header_change} {header_profit} {header_time}")
-            print("-" * 120)
-
-            global last_prices  # 使用全局变量存储价格
+            # 先将整屏内容收集到缓冲区，最后一次性输出
+            out = [
+                f"Stock Monitor - Update Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                f"Number of Stocks: {len(stock_list)} | Interval: {interval}s",
+                SEPARATOR,
+                HEADER_LINE,
+                SEPARATOR,
+            ]
 
             # 并发获取所有股票数据
-            all_stock_data = get_all_stock_data(stock_list)
+            all_stock_data, errors = get_all_stock_data(stock_list)
 
-            # 计算每只股票的收益并存储到列表中，用于排序
-            stock_profits = []
-
-            # 先收集所有股票的上次价格，用于趋势判断
-            last_prices_for_display = {}
-            for stock_item in stock_list:
-                stock_code = stock_item['code']
-                last_prices_for_display[stock_code] = last_prices.get(stock_code)
+            total_profit = 0.0
+            total_cost = 0.0  # 总成本
+            # 按收益排序时先收集 (收益金额, 显示行)，否则直接按股票列表顺序输出
+            rows = [] if sort_by_profit else None
 
-            # 然后处理股票数据并更新价格
-            for stock_item in stock_list:
+            # 只遍历一次：更新价格、格式化显示行并累计总收益和总成本
+            for index, stock_item in enumerate(stock_list):
                 stock_code = stock_item['code']
                 stock_data = all_stock_data[stock_code]
                 stock_info = stock_data['info']
                 holding_quantity = stock_data['quantity']
 
                 if stock_info:
-                    # 获取上次价格用于趋势判断（使用循环开始时的值）
-                    last_price = last_prices_for_display[stock_code]
-                    # 计算利润金额但暂不显示
-                    profit_amount = (stock_info['price'] - stock_info['pre_close']) * holding_quantity
-                    # 更新最后价格
+                    # 先读取上次价格用于趋势判断，再写入本次价格
+                    last_price = last_prices[index]
                     if stock_info['price'] > 0:  # 只有有效价格才更新
-                        last_prices[stock_code] = stock_info['price']
-
-                    # 添加到收益列表用于排序
-                    stock_profits.append({
-                        'stock_item': stock_item,
-                        'stock_info': stock_info,
-                        'holding_quantity': holding_quantity,
-                        'profit_amount': profit_amount
-                    })
-                else:
-                    # 如果无法获取数据，该股票的收益为0
-                    stock_profits.append({
-                        'stock_item': stock_item,
-                        'stock_info': None,
-                        'holding_quantity': holding_quantity,
-                        'profit_amount': 0.0
-                    })
-
-            # 根据参数决定是否按收益金额排序
-            if sort_by_profit:
-                # 按收益金额排序（从高到低）
-                stock_profits.sort(key=lambda x: x['profit_amount'], reverse=True)
-
-            total_profit = 0.0
-            total_cost = 0.0  # 总成本
-            # 按排序后的顺序显示
-            for stock_profit in stock_profits:
-                stock_item = stock_profit['stock_item']
-                stock_info = stock_profit['stock_info']
-                holding_quantity = stock_profit['holding_quantity']
+                        last_prices[index] = stock_info['price']
 
-                if stock_info:
-                    # 获取上次价格用于趋势判断（使用循环开始时的值）
-                    last_price = last_prices_for_display[stock_item['code']]
-                    # 显示股票信息并获取利润金额、当前价格和成本
-                    profit_amount, current_price, cost = display_stock_info(stock_info, holding_quantity, last_price)
+                    # 格式化股票信息并获取利润金额、当前价格和成本
+                    line, profit_amount, current_price, cost = display_stock_info(
+                        stock_info, holding_quantity, last_price
+                    )
                     total_profit += profit_amount
                     total_cost += cost
                 else:
-                    name_display = stock_item['code'][:16]  # 限制名称长度为16个字符
+                    # 如果无法获取数据，该股票的收益为0
+                    profit_amount = 0.0
+                    name_display = stock_code[:16]  # 限制名称长度为16个字符
                     # 使用新函数处理对齐以匹配正常显示
-                    name_str = format_column_text(name_display, 20, 'right')
-                    qty_str = format_column_text(holding_quantity, 10, 'right')
-                    trend_str = format_with_color_padding('\033[93m-\033[0m', 6, '>')  # 趋势符号，右对齐
-                    high_str = format_column_text('--', 8, 'right')  # 最高价
-                    low_str = format_column_text('--', 8, 'right')   # 最低价
-                    price_str = format_column_text('--', 10, 'right')
-                    pct_str = format_column_text('--', 12, 'right')
-                    profit_str = format_column_text('--', 14, 'right')  # 修正列宽
-                    time_str = format_column_text('--', 10, 'right')
-                    print(f"{name_str} {qty_str} {trend_str} {high_str} {low_str} {price_str} {pct_str} {profit_str} {time_str}")
-
-            print("-" * 120)
+                    line = MISSING_ROW_TEMPLATE.format(
+                        name=_format_column_cached(name_display, 20, 'right'),
+                        qty=_format_column_cached(str(holding_quantity), 10, 'right')
+                    )
+
+                if rows is None:
+                    out.append(line)
+                else:
+                    rows.append((profit_amount, line))
+
+            # 根据参数决定是否按收益金额排序（从高到低）
+            if rows is not None:
+                rows.sort(key=lambda row: row[0], reverse=True)
+                out.extend(line for _, line in rows)
+
+            out.append(SEPARATOR)
             # 计算整体收益率
             overall_return_rate = 0.0
             if total_cost != 0:
                 overall_return_rate = (total_profit / total_cost) * 100
 
-            # 显示总收益和整体收益率
-            if total_profit > 0:
-                total_profit_str = f"\033[91m{total_profit:>10.2f}\033[0m"  # 红色表示总盈利
-            elif total_profit < 0:
-                total_profit_str = f"\033[92m{total_profit:>10.2f}\033[0m"  # 绿色表示总亏损
-            else:
-                total_profit_str = f"\033[93m{total_profit:>10.2f}\033[0m"  # 黄色表示无盈亏
-
-            if overall_return_rate > 0:
-                overall_return_rate_str = f"\033[91m{overall_return_rate:>8.2f}%\033[0m"  # 红色表示正收益率
-            elif overall_return_rate < 0:
-                overall_return_rate_str = f"\033[92m{overall_return_rate:>8.2f}%\033[0m"  # 绿色表示负收益率
-            else:
-                overall_return_rate_str = f"\033[93m{overall_return_rate:>8.2f}%\033[0m"  # 黄色表示零收益率
+            # 显示总收益和整体收益率（红色盈利，绿色亏损，黄色无盈亏）
+            total_profit_color = SIGN_COLORS[_sign_index(total_profit)]
+            total_profit_str = f"{total_profit_color}{total_profit:>10.2f}{RESET}"
+            overall_return_color = SIGN_COLORS[_sign_index(overall_return_rate)]
+            overall_return_rate_str = f"{overall_return_color}{overall_return_rate:>8.2f}%{RESET}"
 
             # 使用新函数格式化标签以实现正确对齐
-            total_profit_label = format_column_text('Total Profit:', 58, 'right')
-            overall_return_label = format_column_text('Overall Return:', 15, 'right')
-            print(f"{total_profit_label} {total_profit_str}  {overall_return_label} {overall_return_rate_str}")
+            total_profit_label = _format_column_cached('Total Profit:', 58, 'right')
+            overall_return_label = _format_column_cached('Overall Return:', 15, 'right')
+            out.append(f"{total_profit_label} {total_profit_str}  {overall_return_label} {overall_return_rate_str}")
+            # 获取数据时的错误信息显示在表格下方，保留到下次刷新
+            out.extend(errors)
+
+            # 按终端宽度计算每行换行后实际占用的行数；
+            # 终端尺寸和各行占用行数都不变且屏幕能完整容纳时只重绘变化的行，否则清屏后完整重绘
+            term_size = shutil.get_terminal_size()
+            line_rows = [get_line_rows(line, term_size.columns) for line in out]
+            if (term_size != last_term_size or line_rows != last_line_rows
+                    or term_size.lines <= sum(line_rows)):
+                sys.stdout.write(CLEAR_SCREEN + '\n'.join(out) + '\n')
+            else:
+                sys.stdout.write(build_repaint(out, last_frame, line_rows))
+            sys.stdout.flush()
+            last_frame = out
+            last_line_rows = line_rows
+            last_term_size = term_size
 
             # 开始倒计时循环，只更新倒计时部分
             remaining_time = interval
+            # 下次更新时间在倒计时期间不变，只需计算一次
+            next_update_str = (datetime.now() + timedelta(seconds=interval)).strftime('%Y-%m-%d %H:%M:%S')
 
             while remaining_time > 0:
-                # 显示倒计时
-                next_update_time = datetime.now() + timedelta(seconds=remaining_time)
-                countdown_line = f"Next update: {next_update_time.strftime('%Y-%m-%d %H:%M:%S')} (Remaining: {remaining_time}s)"
-                print(countdown_line)
+                # 回到行首重绘倒计时并清除行尾残留字符
+                sys.stdout.write(f"\rNext update: {next_update_str} (Remaining: {remaining_time}s)\x1b[K")
+                sys.stdout.flush()
 
                 # 等待1秒
                 time.sleep(1)
                 remaining_time -= 1
 
-                # 使用ANSI转义序列移动光标向上一行并更新内容
-                if remaining_time > 0:
-                    print(f"\033[A\033[2K\033[G", end="")
-
     except KeyboardInterrupt:
         print("\nMonitoring stopped")
+    finally:
+        sys.stdout.write(SHOW_CURSOR)
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":